@@ -1,6 +1,9 @@
 # === CONFIG ===
 import os
-import requests
+import secrets
+import asyncio
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 from telegram import Update
@@ -17,60 +20,142 @@ BOT_TOKEN = os.environ.get("BOT_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("Please set BOT_TOKEN in Render environment variables.")
 
+# Public HTTPS base URL for webhook mode; Render sets RENDER_EXTERNAL_URL itself.
+# Without one (e.g. running locally) the bot falls back to polling.
+PUBLIC_URL = os.environ.get("WEBHOOK_URL") or os.environ.get("RENDER_EXTERNAL_URL")
+PORT = int(os.environ.get("PORT", "8443"))
+# Fresh on every start; run_webhook re-registers the URL with Telegram
+SECRET_PATH = secrets.token_hex(16)
+SECRET_TOKEN = secrets.token_hex(32)
+
 # === GLOBALS ===
-tracked_tokens = {}  # {token_address: {"name": "TokenName", "symbol": "SYM", "chain": "bnb"}}
+tracked_tokens = {}  # {normalize_ca(token_address): {"name": "TokenName", "symbol": "SYM", "chain": "bnb"}}
 MEME_IMAGES = {
     "1x": "https://i.imgur.com/bpPEA0Y.png",   # Slightly happy meme
     "2x": "https://i.imgur.com/XbKhtTo.png",   # Excited meme
     "5x": "https://i.imgur.com/q2q0mEm.png",   # Crazy happy meme
     "10x": "https://i.imgur.com/rI5yA1v.png",  # Overjoyed meme
 }
+MEME_CACHE = {}  # {"1x": PIL.Image}, decoded and flattened once and reused for every card
 BNB_YELLOW = (243, 186, 47)
+CARD_BG = (15, 15, 15)
+# Loaded once: load_default() rebuilds the font from scratch on every call
+FONT_LARGE = ImageFont.load_default()
+FONT_BOLD = FONT_LARGE
+# Extra gap between stats lines so multiline_text keeps a 30px line pitch
+STATS_SPACING = 30 - FONT_LARGE.getbbox("A")[3]
+HTTP = None  # shared aiohttp.ClientSession, opened in post_init
+# Card rendering is CPU-bound; threads suffice since Pillow releases the GIL in C code
+RENDER_POOL = ThreadPoolExecutor(max_workers=4)
+
+
+# === HTTP SESSION ===
+async def open_http(app):
+    """Open the keep-alive HTTP session shared by all handlers."""
+    global HTTP
+    HTTP = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=10),
+        connector=aiohttp.TCPConnector(limit=32, limit_per_host=8),
+    )
+
+
+async def close_http(app):
+    """Close the shared HTTP session on shutdown."""
+    if HTTP is not None:
+        await HTTP.close()
+
+
+async def http_get_bytes(url, retries=2, backoff=0.3):
+    """GET url over the shared session, retrying timeouts and 5xx responses."""
+    for attempt in range(retries + 1):
+        try:
+            async with HTTP.get(url) as response:
+                response.raise_for_status()
+                return await response.read()
+        except aiohttp.ClientResponseError as e:
+            if e.status < 500 or attempt == retries:
+                raise
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def on_startup(app):
+    """Open the HTTP session and warm the meme cache."""
+    await open_http(app)
+    await preload_memes()
 
 
 # === HELPER FUNCTIONS ===
-def generate_pnl_card(name, symbol, x_gain, marketcap, price):
-    """Generate an image with meme + PNL text for Telegram."""
-    # Pick meme by x_gain range
+def normalize_ca(ca):
+    """Lowercase EVM addresses; Solana base58 addresses are case-sensitive."""
+    ca = ca.strip()
+    return ca.lower() if ca.startswith("0x") else ca
+
+
+def pick_meme(x_gain):
+    """Pick the meme key matching the x_gain range."""
     if x_gain < 2:
-        meme_url = MEME_IMAGES["1x"]
+        return "1x"
     elif x_gain < 5:
-        meme_url = MEME_IMAGES["2x"]
+        return "2x"
     elif x_gain < 10:
-        meme_url = MEME_IMAGES["5x"]
-    else:
-        meme_url = MEME_IMAGES["10x"]
+        return "5x"
+    return "10x"
 
-    # Download meme
-    response = requests.get(meme_url)
-    meme_img = Image.open(BytesIO(response.content)).convert("RGBA")
 
+async def fetch_meme(meme_url):
+    """Download a meme and flatten it onto the card background."""
+    content = await http_get_bytes(meme_url)
+    meme_img = Image.open(BytesIO(content)).convert("RGBA")
+    # Composite the alpha once here so each card can paste without a mask
+    flat = Image.new("RGB", meme_img.size, CARD_BG)
+    flat.paste(meme_img, (0, 0), mask=meme_img)
+    return flat
+
+
+async def get_meme(key):
+    """Return the decoded meme for key, downloading it only on first use."""
+    if key not in MEME_CACHE:
+        MEME_CACHE[key] = await fetch_meme(MEME_IMAGES[key])
+    return MEME_CACHE[key]
+
+
+async def preload_memes():
+    """Download and decode every meme once so /pnl doesn't have to."""
+    results = await asyncio.gather(*(get_meme(key) for key in MEME_IMAGES), return_exceptions=True)
+    for key, result in zip(MEME_IMAGES, results):
+        if isinstance(result, Exception):
+            # Not fatal: get_meme retries the download on the first /pnl that needs it
+            print(f"⚠️ Could not preload {key} meme: {result}")
+
+
+def generate_pnl_card(meme_img, name, symbol, x_gain, marketcap, price):
+    """Generate an image with meme + PNL text for Telegram."""
     # Prepare canvas
     width, height = meme_img.size
-    card = Image.new("RGBA", (width + 400, height), (15, 15, 15, 255))
+    card = Image.new("RGB", (width + 400, height), CARD_BG)
     card.paste(meme_img, (0, 0))
 
     # Draw text
     draw = ImageDraw.Draw(card)
-    font_large = ImageFont.load_default()
-    font_bold = ImageFont.load_default()
 
     text_x = width + 20
     y_offset = 50
 
-    draw.text((text_x, y_offset), f"{name} (${symbol})", fill=BNB_YELLOW, font=font_bold)
+    draw.text((text_x, y_offset), f"{name} (${symbol})", fill=BNB_YELLOW, font=FONT_BOLD)
     y_offset += 40
-    draw.text((text_x, y_offset), f"Gain: {x_gain:.2f}x", fill=(255, 255, 255), font=font_large)
-    y_offset += 30
-    draw.text((text_x, y_offset), f"Market Cap: ${marketcap:,}", fill=(200, 200, 200), font=font_large)
+    draw.text((text_x, y_offset), f"Gain: {x_gain:.2f}x", fill=(255, 255, 255), font=FONT_LARGE)
     y_offset += 30
-    draw.text((text_x, y_offset), f"Price: ${price}", fill=(200, 200, 200), font=font_large)
-    y_offset += 40
-    draw.text((text_x, y_offset), f"Powered by The Alpha House 🟡", fill=BNB_YELLOW, font=font_large)
+    stats = f"Market Cap: ${marketcap:,}\nPrice: ${price}"
+    draw.multiline_text((text_x, y_offset), stats, fill=(200, 200, 200), font=FONT_LARGE, spacing=STATS_SPACING)
+    y_offset += 70
+    draw.text((text_x, y_offset), f"Powered by The Alpha House 🟡", fill=BNB_YELLOW, font=FONT_LARGE)
 
     # Save image
     output = BytesIO()
-    card.save(output, format="PNG")
+    card.save(output, format="JPEG", quality=88)
     output.seek(0)
     return output
 
@@ -91,7 +176,7 @@ async def pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Please provide a token CA, e.g. /pnl 0x123...")
         return
 
-    ca = context.args[0]
+    ca = normalize_ca(context.args[0])
     token_data = {
         "name": "SampleCoin",
         "symbol": "SMP",
@@ -101,7 +186,11 @@ async def pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
     }
 
     # Generate and send image
-    image_file = generate_pnl_card(
+    meme_img = await get_meme(pick_meme(token_data["x_gain"]))
+    image_file = await asyncio.get_running_loop().run_in_executor(
+        RENDER_POOL,
+        generate_pnl_card,
+        meme_img,
         token_data["name"],
         token_data["symbol"],
         token_data["x_gain"],
@@ -127,7 +216,7 @@ async def untrack(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(context.args) == 0:
         await update.message.reply_text("Please provide a token address to untrack.")
         return
-    ca = context.args[0]
+    ca = normalize_ca(context.args[0])
     if ca in tracked_tokens:
         del tracked_tokens[ca]
         await update.message.reply_text(f"❌ Untracked {ca}")
@@ -137,13 +226,28 @@ async def untrack(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # === MAIN ===
 def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(close_http)
+        .build()
+    )
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("pnl", pnl))
     app.add_handler(CommandHandler("list", list_tokens))
     app.add_handler(CommandHandler("untrack", untrack))
     print("🤖 The Alpha House Bot is running...")
-    app.run_polling()
+    if PUBLIC_URL:
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=PORT,
+            url_path=SECRET_PATH,
+            webhook_url=f"{PUBLIC_URL.rstrip('/')}/{SECRET_PATH}",
+            secret_token=SECRET_TOKEN,
+        )
+    else:
+        app.run_polling()
 
 
 if __name__ == "__main__":